@@ -2,6 +2,7 @@ import typer
 import webbrowser
 import pathlib
 from collections import defaultdict
+from functools import lru_cache
 from autogen import AssistantAgent, UserProxyAgent, GroupChat, GroupChatManager
 from rich.progress import Progress
 from time import sleep
@@ -108,30 +109,60 @@ def get_ai(ai_name: Annotated[str, typer.Argument()]):
     return ai['ai']['code']
 
 @app.command()
-def get_fight(fight_id: int):
+def get_fight(
+        fight_id: int,
+        max_errors: Annotated[int, typer.Option(help="Max errors kept per leek")] = 50,
+        max_debug_logs: Annotated[int, typer.Option(help="Max debug lines kept per leek")] = 100,
+        max_message_length: Annotated[int, typer.Option(help="Truncate messages longer than this")] = 1000,
+        dedup: Annotated[bool, typer.Option(help="Drop repeated messages")] = True
+    ):
     settings = Settings()
     lw = LeekWars(settings)
 
     fight_obj = lw.fight.get(fight_id)
-    fight_logs = lw.fight.get_logs(fight_id)
-
-    errors = defaultdict(list)
-    for file,number in fight_logs.items():
-        if not isinstance(number, dict):
-            continue
-
-        for _,nested_errors in number.items():
-            for e in nested_errors:
-                errors[file].append(
-                    LeekScriptError.from_fight_logs(e).model_dump(include=['error_number', 'error'])
-                    if len(e) > 3 else {'debug_log': e[2]}
-            )
 
     webbrowser.open_new_tab(f"https://leekwars.com/report/{fight_id}")
     print(fight_obj)
-    print(dict(errors))
+
+    errors = defaultdict(list)
+    fight_logs = lw.fight.stream_logs(
+        fight_id,
+        max_errors=max_errors,
+        max_debug_logs=max_debug_logs,
+        max_message_length=max_message_length,
+        dedup=dedup
+    )
+    for file,entry in fight_logs:
+        if 'suppressed' in entry:
+            print(f"[yellow]{file}: messages suppressed by caps/dedup/truncation: {entry['suppressed']}[/yellow]")
+        else:
+            print(file, entry)
+        errors[file].append(entry)
+
     return fight_obj, dict(errors)
 
+@lru_cache(maxsize=8)
+def load_fight_replay(fight_id: int):
+    settings = Settings()
+    lw = LeekWars(settings)
+
+    return lw.fight.replay(fight_id)
+
+@app.command()
+def fight_state(
+        fight_id: Annotated[int, typer.Argument()],
+        turn: Annotated[int, typer.Argument()]
+    ):
+
+    try:
+        state = load_fight_replay(fight_id).state_at_turn(turn).model_dump()
+    except ValueError as e:
+        print(f"[bold red]{e}[/bold red]")
+        raise typer.Exit(code=1)
+
+    print(state)
+    return state
+
 @app.command()
 def start_fight(
         ai_name: Annotated[str, typer.Argument()],
@@ -340,6 +371,17 @@ def run():
         else:
             return response
 
+    @user_proxy.register_for_execution()
+    @fight_analyzer.register_for_llm(description="Returns the position, HP, full TP/MP pool and active effects of every entity at the start of a given turn of a fight, before anyone has acted.")
+    def get_fight_state(
+            fight_id: Annotated[int, "The ID of the fight, as found in the fight results."],
+            turn: Annotated[int, "The turn number to inspect."]
+        ):
+        try:
+            return load_fight_replay(fight_id).state_at_turn(turn).model_dump()
+        except ValueError as e:
+            return {"error": str(e)}
+
     groupchat = GroupChat(agents=[user_proxy, engineer, critic, executor, fight_analyzer], messages=[], max_round=100)
     manager = GroupChatManager(groupchat=groupchat, llm_config=llm_config) 
 
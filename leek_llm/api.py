@@ -1,6 +1,8 @@
 import httpx
 from pydantic import SecretStr
 from .models import Settings
+from .replay import FightReplay
+from .stream import JsonStream, iter_fields, iter_fight_logs
 
 def _raise_on_4xx_5xx(response):
     response.raise_for_status()
@@ -48,6 +50,17 @@ class Fight(BaseApiClient):
         r = self.session.get(f"/fight/get-logs/{fight}")
         return r.json()
 
+    def stream_logs(self, fight: int, **kwargs):
+        with self.session.stream("GET", f"/fight/get-logs/{fight}") as r:
+            yield from iter_fight_logs(r.iter_text(), **kwargs)
+
+    def replay(self, fight: int, checkpoint_interval: int = 50):
+        # Only the leeks and actions of the report are decoded, the rest is skipped as it streams
+        with self.session.stream("GET", f"/fight/get/{fight}") as r:
+            fight_data = dict(iter_fields(JsonStream(r.iter_text()), ['data'], {'leeks', 'actions'}))
+
+        return FightReplay(fight_data, checkpoint_interval)
+
 class Encyclopedia(BaseApiClient):
     def get(self, code: str, language: str = 'en'):
         r = self.session.get(f"/encyclopedia/get/{language}/{code}")
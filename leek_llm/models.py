@@ -1,6 +1,7 @@
 import re
 import json
 from enum import Enum
+from functools import cache
 from . import data as pkgdata
 from importlib import resources
 from xml.etree import ElementTree as ET
@@ -81,6 +82,11 @@ class FightData(BaseModel):
             ]
         )
 
+@cache
+def load_leekscript_errors():
+    with (resources.files(pkgdata) / "leekscript.json").open() as f:
+        return json.load(f)
+
 class LeekScriptError(BaseModel):
     error_number: int
     error: str
@@ -90,8 +96,7 @@ class LeekScriptError(BaseModel):
 
     @classmethod
     def from_api_error(cls, data):
-        with (resources.files(pkgdata) / "leekscript.json").open() as f:
-            leekscript_errors = json.load(f)
+        leekscript_errors = load_leekscript_errors()
 
         formatted_error=leekscript_errors[f"error_{data[6]}"]
         if len(data) == 8 and isinstance(data[7], list):
@@ -107,8 +112,7 @@ class LeekScriptError(BaseModel):
 
     @classmethod
     def from_fight_logs(cls, data):
-        with (resources.files(pkgdata) / "leekscript.json").open() as f:
-            leekscript_errors = json.load(f)
+        leekscript_errors = load_leekscript_errors()
 
         formatted_error = leekscript_errors[f"error_{data[3]}"]
         formatted_error = data[2] + formatted_error.format(*data[4])
@@ -0,0 +1,265 @@
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from .models import ActionType, FightData, Action
+
+# Effect ids (see EFFECT_* in data/constants.xml) that change an entity's TP/MP pool
+TP_EFFECTS = {8: 1, 32: 1, 18: -1}  # EFFECT_BUFF_TP, EFFECT_RAW_BUFF_TP, EFFECT_SHACKLE_TP
+MP_EFFECTS = {7: 1, 31: 1, 17: -1}  # EFFECT_BUFF_MP, EFFECT_RAW_BUFF_MP, EFFECT_SHACKLE_MP
+
+ACTION_TYPES = {action_type.value for action_type in ActionType}
+
+# Action types that take life from their target: [target, value, erosion?]
+LIFE_LOSS_ACTIONS = {
+    ActionType.LIFE_LOST,
+    ActionType.DAMAGE_RETURN,
+    ActionType.LIFE_DAMAGE,
+    ActionType.POISON_DAMAGE,
+    ActionType.AFTEREFFECT,
+}
+
+class ActiveEffect(BaseModel):
+    effect: int
+    value: int
+    turns: int
+    caster: int
+    item: int
+
+class EntityState(BaseModel):
+    id: int
+    name: str = ''
+    team: int = 0
+    cell: Optional[int] = None
+    life: int = 0
+    max_life: int = 0
+    tp: int = 0
+    total_tp: int = 0
+    mp: int = 0
+    total_mp: int = 0
+    alive: bool = True
+    effects: Dict[int, ActiveEffect] = {}
+
+class FightState(BaseModel):
+    action_index: int = 0
+    turn: int = 0
+    current_entity: Optional[int] = None
+    entities: Dict[int, EntityState] = {}
+
+class FightReplay:
+    '''
+    Folds the action stream of a fight into per-entity state.
+
+    A full pass is made once on construction and a snapshot is stored every
+    `checkpoint_interval` actions, so reaching any action (or turn) only
+    replays at most `checkpoint_interval` actions from the closest snapshot.
+    Actions whose type is not in `ActionType` are dropped before indexing.
+    '''
+
+    def __init__(self, fight_data: dict, checkpoint_interval: int = 50) -> None:
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be at least 1")
+
+        if not fight_data or not fight_data.get('leeks') or fight_data.get('actions') is None:
+            raise ValueError("fight has no data yet")
+
+        self.checkpoint_interval = checkpoint_interval
+        self.actions: List[Action] = FightData.from_api({
+            'actions': [action for action in fight_data['actions'] if action[0] in ACTION_TYPES]
+        }).actions
+        self.turn_starts: Dict[int, int] = {}
+        self.snapshots: List[Tuple[int, FightState]] = []
+
+        state = self.initial_state(fight_data)
+        self.snapshots.append((0, state.model_copy(deep=True)))
+        for index, action in enumerate(self.actions):
+            if action.action_type == ActionType.NEW_TURN:
+                self.turn_starts[action.action_data[0]] = index
+
+            self.apply(state, action)
+            state.action_index = index + 1
+
+            if state.action_index % checkpoint_interval == 0:
+                self.snapshots.append((state.action_index, state.model_copy(deep=True)))
+
+        self.final_state = state
+
+    @staticmethod
+    def initial_state(fight_data: dict) -> FightState:
+        entities = {}
+        for leek in fight_data.get('leeks', []):
+            entities[leek['id']] = EntityState(
+                id=leek['id'],
+                name=leek.get('name', ''),
+                team=leek.get('team', 0),
+                cell=leek.get('cellPos'),
+                life=leek.get('life', 0),
+                max_life=leek.get('life', 0),
+                tp=leek.get('tp', 0),
+                total_tp=leek.get('tp', 0),
+                mp=leek.get('mp', 0),
+                total_mp=leek.get('mp', 0),
+                # Summons are declared up front but only enter the fight on their SUMMON action
+                alive=not leek.get('summon', False),
+            )
+
+        return FightState(entities=entities)
+
+    @staticmethod
+    def apply(state: FightState, action: Action):
+        data = action.action_data
+        entities = state.entities
+
+        match action.action_type:
+            case ActionType.NEW_TURN:
+                # Every entity starts the turn with its full TP/MP pool
+                state.turn = data[0]
+                for entity in entities.values():
+                    if entity.alive:
+                        entity.tp = entity.total_tp
+                        entity.mp = entity.total_mp
+
+            case ActionType.LEEK_TURN:
+                state.current_entity = data[0]
+                if entity := entities.get(data[0]):
+                    entity.tp = entity.total_tp
+                    entity.mp = entity.total_mp
+
+            case ActionType.END_TURN:
+                if entity := entities.get(data[0]):
+                    for effect in entity.effects.values():
+                        if effect.turns > 0:
+                            effect.turns -= 1
+
+            case ActionType.MOVE_TO:
+                if entity := entities.get(data[0]):
+                    entity.cell = data[1]
+
+            case ActionType.TP_LOST:
+                if entity := entities.get(data[0]):
+                    entity.tp -= data[1]
+
+            case ActionType.MP_LOST:
+                if entity := entities.get(data[0]):
+                    entity.mp -= data[1]
+
+            case action_type if action_type in LIFE_LOSS_ACTIONS:
+                if entity := entities.get(data[0]):
+                    entity.life = max(entity.life - data[1], 0)
+                    if len(data) > 2 and isinstance(data[2], int):
+                        entity.max_life -= data[2]
+
+            case ActionType.NOVA_DAMAGE:
+                if entity := entities.get(data[0]):
+                    entity.max_life -= data[1]
+
+            case ActionType.CARE:
+                if entity := entities.get(data[0]):
+                    entity.life = min(entity.life + data[1], entity.max_life)
+
+            case ActionType.BOOST_VITA | ActionType.NOVA_VITALITY:
+                if entity := entities.get(data[0]):
+                    entity.max_life += data[1]
+                    if action.action_type == ActionType.BOOST_VITA:
+                        entity.life += data[1]
+
+            case ActionType.PLAYER_DEAD:
+                if entity := entities.get(data[0]):
+                    entity.alive = False
+                    entity.life = 0
+                    entity.effects.clear()
+
+            case ActionType.SUMMON:
+                # [caster, summon id, cell, ...]
+                if entity := entities.get(data[1]):
+                    entity.cell = data[2]
+                    entity.alive = True
+                else:
+                    caster = entities.get(data[0])
+                    entities[data[1]] = EntityState(
+                        id=data[1],
+                        team=caster.team if caster else 0,
+                        cell=data[2],
+                    )
+
+            case ActionType.RESURRECTION:
+                # [caster, target, cell, life, max life]
+                if entity := entities.get(data[1]):
+                    entity.alive = True
+                    entity.cell = data[2]
+                    entity.life = data[3]
+                    entity.max_life = data[4]
+
+            case ActionType.ADD_WEAPON_EFFECT | ActionType.ADD_CHIP_EFFECT | ActionType.ADD_STACKED_EFFECT:
+                # [item, effect id, caster, target, effect, value, turns, modifiers?]
+                item, effect_id, caster, target, effect, value, turns = data[:7]
+                if entity := entities.get(target):
+                    entity.effects[effect_id] = ActiveEffect(
+                        effect=effect, value=value, turns=turns, caster=caster, item=item
+                    )
+                    FightReplay._apply_pool_effect(entity, effect, value)
+
+            case ActionType.UPDATE_EFFECT:
+                # [effect id, new value]
+                for entity in entities.values():
+                    if effect := entity.effects.get(data[0]):
+                        FightReplay._apply_pool_effect(entity, effect.effect, data[1] - effect.value)
+                        effect.value = data[1]
+                        break
+
+            case ActionType.STACK_EFFECT:
+                # [effect id, added value]
+                for entity in entities.values():
+                    if effect := entity.effects.get(data[0]):
+                        FightReplay._apply_pool_effect(entity, effect.effect, data[1])
+                        effect.value += data[1]
+                        break
+
+            case ActionType.REMOVE_EFFECT:
+                # [effect id]
+                for entity in entities.values():
+                    if effect := entity.effects.pop(data[0], None):
+                        FightReplay._apply_pool_effect(entity, effect.effect, -effect.value, current=False)
+                        break
+
+    @staticmethod
+    def _apply_pool_effect(entity: EntityState, effect: int, value: int, current: bool = True):
+        if sign := TP_EFFECTS.get(effect):
+            entity.total_tp += sign * value
+            entity.tp = entity.tp + sign * value if current else min(entity.tp, entity.total_tp)
+        elif sign := MP_EFFECTS.get(effect):
+            entity.total_mp += sign * value
+            entity.mp = entity.mp + sign * value if current else min(entity.mp, entity.total_mp)
+
+    def state_at(self, action_index: int) -> FightState:
+        '''
+        State after the first `action_index` actions have been applied.
+        '''
+        action_index = max(0, min(action_index, len(self.actions)))
+        if action_index == len(self.actions):
+            return self.final_state.model_copy(deep=True)
+
+        position = bisect_right(self.snapshots, action_index, key=lambda s: s[0]) - 1
+        start, snapshot = self.snapshots[position]
+
+        state = snapshot.model_copy(deep=True)
+        for index in range(start, action_index):
+            self.apply(state, self.actions[index])
+            state.action_index = index + 1
+
+        return state
+
+    def state_at_turn(self, turn: int) -> FightState:
+        '''
+        State at the start of `turn` (right after its NEW_TURN action),
+        with every living entity's TP/MP refilled.
+        '''
+        if turn not in self.turn_starts:
+            raise ValueError(f"Turn {turn} not in fight, valid turns are {self.turn_range}")
+
+        return self.state_at(self.turn_starts[turn] + 1)
+
+    @property
+    def turn_range(self) -> Tuple[int, int] | None:
+        if not self.turn_starts:
+            return None
+        return min(self.turn_starts), max(self.turn_starts)
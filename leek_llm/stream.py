@@ -0,0 +1,307 @@
+import re
+import json
+import hashlib
+from typing import Any, Iterable, Iterator, List, Set, Tuple
+from .models import LeekScriptError
+
+class JsonStream:
+    '''
+    Minimal pull parser over an iterator of JSON text chunks.
+
+    Only the value currently being read is held in memory, so large
+    objects and arrays can be walked item by item as they are downloaded.
+    Values yielded to by `iter_object`/`iter_array` must be consumed
+    (`read_value` or `skip_value`) before advancing the iterator.
+    '''
+
+    WHITESPACE = ' \t\r\n'
+    NUMBER = '+-.0123456789eE'
+    STRUCTURE = re.compile(r'["\[\]{}]')
+    # Body of a string up to its closing quote (or a lone backslash at the end of the buffer)
+    STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+    def __init__(self, chunks: Iterable[str]) -> None:
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+
+    def _fill(self, size: int = 1) -> bool:
+        '''
+        Reads chunks until at least `size` more characters are buffered.
+        Returns False if the stream ended before anything could be read.
+        '''
+        pending = [self.buffer[self.pos:]]
+        read = 0
+        for chunk in self.chunks:
+            pending.append(chunk)
+            read += len(chunk)
+            if read >= max(size, 1):
+                break
+
+        self.buffer = ''.join(pending)
+        self.pos = 0
+        return read > 0
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self.buffer, self.pos)
+
+        self.pos += 1
+        return char
+
+    def read_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Value is incomplete: double the buffered text so long values decode in linear time
+                if self._fill(len(self.buffer) - self.pos):
+                    continue
+                raise
+
+            # A number is only complete once a non-number character follows it,
+            # e.g. "1." decodes as 1 but may continue as "1.5" in the next chunk
+            if self.buffer[self.pos] in self.NUMBER and self._number_may_continue(end) and self._fill():
+                continue
+
+            self.pos = end
+            return value
+
+    def _number_may_continue(self, end: int) -> bool:
+        return all(char in self.NUMBER for char in self.buffer[end:])
+
+    def _fill_or_raise(self, message: str):
+        if not self._fill():
+            raise json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def skip_value(self):
+        '''
+        Advances past the next value by matching quotes and brackets, without decoding it.
+        '''
+        if self.peek() not in '{["':
+            # Scalars are short, decoding them is cheaper than scanning
+            self.read_value()
+            return
+
+        depth = 0
+        in_string = False
+        while True:
+            if in_string:
+                self.pos = self.STRING_BODY.match(self.buffer, self.pos).end()
+                if self.pos == len(self.buffer) or self.buffer[self.pos] != '"':
+                    # The string (or an escape sequence) continues in the next chunk
+                    self._fill_or_raise("Unterminated string")
+                    continue
+                self.pos += 1
+                in_string = False
+            else:
+                match = self.STRUCTURE.search(self.buffer, self.pos)
+                if not match:
+                    self.pos = len(self.buffer)
+                    self._fill_or_raise("Unterminated value")
+                    continue
+
+                self.pos = match.end()
+                if match.group() == '"':
+                    in_string = True
+                    continue
+                depth += 1 if match.group() in '[{' else -1
+
+            if depth == 0:
+                return
+
+    def read_string(self, limit: int, digest=None) -> Tuple[str, int]:
+        '''
+        Reads a string value keeping only its first `limit` raw characters, so long
+        strings are scanned without being held in memory. Returns the decoded prefix
+        and the raw length of the whole string. The full raw string is fed to `digest`
+        (a hashlib object) if one is given.
+        '''
+        self.expect('"')
+        prefix = []
+        kept = length = 0
+        while True:
+            end = self.STRING_BODY.match(self.buffer, self.pos).end()
+            segment = self.buffer[self.pos:end]
+            length += len(segment)
+            if digest:
+                digest.update(segment.encode())
+            if kept < limit:
+                prefix.append(segment[:limit - kept])
+                kept += len(prefix[-1])
+            self.pos = end
+
+            if end < len(self.buffer) and self.buffer[end] == '"':
+                self.pos += 1
+                break
+
+            # At most a lone backslash is left, it is carried over into the next chunk
+            self._fill_or_raise("Unterminated string")
+
+        # The prefix may end in the middle of an escape sequence (at most 6 characters, e.g. \u00e9)
+        raw = ''.join(prefix)
+        for cut in range(len(raw), max(len(raw) - 7, -1), -1):
+            try:
+                return json.loads(f'"{raw[:cut]}"'), length
+            except json.JSONDecodeError:
+                continue
+
+        raise json.JSONDecodeError("Invalid string", raw, 0)
+
+    def iter_object(self) -> Iterator[str]:
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def iter_array(self) -> Iterator[int]:
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.expect(',]') == ']':
+                return
+
+def iter_fields(stream: JsonStream, path: List[str], fields: Set[str]) -> Iterator[Tuple[str, Any]]:
+    '''
+    Yields (key, value) for each of `fields` in the object found at `path`, skipping everything else.
+    '''
+    if not path:
+        for key in stream.iter_object():
+            if key in fields:
+                yield key, stream.read_value()
+            else:
+                stream.skip_value()
+        return
+
+    key, *rest = path
+    for k in stream.iter_object():
+        if k == key and stream.peek() == '{':
+            yield from iter_fields(stream, rest, fields)
+        else:
+            stream.skip_value()
+
+def _truncate(text: str, length: int) -> str:
+    if len(text) <= length:
+        return text
+    return f"{text[:length]}... ({len(text) - length} more characters)"
+
+def _read_message(stream: JsonStream, limit: int, digest) -> Tuple[str, int]:
+    if stream.peek() == '"':
+        return stream.read_string(limit, digest)
+
+    text = json.dumps(stream.read_value())
+    digest.update(text.encode())
+    return text[:limit], len(text)
+
+def iter_fight_logs(
+        chunks: Iterable[str],
+        max_errors: int = 50,
+        max_debug_logs: int = 100,
+        max_message_length: int = 1000,
+        dedup: bool = True
+    ) -> Iterator[Tuple[str, dict]]:
+    '''
+    Yields (leek, entry) pairs from a /fight/get-logs response as they are decoded.
+
+    At most `max_errors` errors and `max_debug_logs` debug lines are kept per leek,
+    messages are truncated to `max_message_length` characters and, if `dedup` is set,
+    repeated messages from the same leek are only yielded once. If anything was
+    dropped or truncated, a final {'suppressed': {...}} entry with the counts is
+    yielded for that leek.
+
+    Only the first `max_message_length` characters of a message are ever decoded,
+    and once both caps are reached messages are scanned past without decoding.
+    '''
+    stream = JsonStream(chunks)
+
+    for leek in stream.iter_object():
+        if stream.peek() != '{':
+            stream.skip_value()
+            continue
+
+        seen = set()
+        errors = debug_logs = 0
+        suppressed = {'errors': 0, 'debug_logs': 0, 'duplicates': 0, 'truncated': 0}
+        for _ in stream.iter_object():
+            if stream.peek() != '[':
+                stream.skip_value()
+                continue
+
+            for _ in stream.iter_array():
+                # [entity, type, message, error number?, error params?]
+                capped = errors >= max_errors and debug_logs >= max_debug_logs
+                digest = hashlib.sha256()
+                fields = []
+                message, length = '', 0
+                for index in stream.iter_array():
+                    if index != 2:
+                        fields.append(stream.read_value())
+                        continue
+
+                    fields.append(None)
+                    if capped:
+                        stream.skip_value()
+                    else:
+                        message, length = _read_message(stream, max_message_length, digest)
+
+                is_error = len(fields) > 3
+
+                if is_error and errors >= max_errors:
+                    suppressed['errors'] += 1
+                    continue
+                if not is_error and debug_logs >= max_debug_logs:
+                    suppressed['debug_logs'] += 1
+                    continue
+
+                if dedup:
+                    # Keyed on the whole message, not the truncated one
+                    key = (digest.digest(), repr(fields[3:]))
+                    if key in seen:
+                        suppressed['duplicates'] += 1
+                        continue
+                    seen.add(key)
+
+                truncated = length > max_message_length
+                if is_error:
+                    fields[2] = message
+                    entry = LeekScriptError.from_fight_logs(fields).model_dump(include=['error_number', 'error'])
+                    truncated = truncated or len(entry['error']) > max_message_length
+                    entry['error'] = _truncate(entry['error'], max_message_length)
+                    errors += 1
+                else:
+                    if truncated:
+                        message = f"{message}... ({length - max_message_length} more characters)"
+                    entry = {'debug_log': message}
+                    debug_logs += 1
+
+                suppressed['truncated'] += truncated
+
+                yield leek, entry
+
+        if any(suppressed.values()):
+            yield leek, {'suppressed': suppressed}
@@ -0,0 +1,139 @@
+import pytest
+from leek_llm.replay import FightReplay
+
+FIGHT_DATA = {
+    'leeks': [
+        {'id': 0, 'name': 'alpha', 'team': 1, 'cellPos': 10, 'life': 100, 'tp': 10, 'mp': 3},
+        {'id': 1, 'name': 'beta', 'team': 2, 'cellPos': 20, 'life': 100, 'tp': 10, 'mp': 3},
+    ],
+    'actions': [
+        [0],
+        [6, 1],
+        [7, 0],
+        [10, 0, 12, [11, 12]],      # alpha moves to 12
+        [102, 0, 2],                # alpha spends 2 MP
+        [100, 0, 3],                # alpha spends 3 TP
+        [101, 1, 15, 1],            # beta loses 15 HP, 1 erosion
+        [302, 5, 1, 0, 1, 8, 4, 2, 0],  # alpha gives beta +4 TP for 2 turns (effect 1)
+        [9, 0, 2, 30],              # alpha summons entity 2 on cell 30
+        [8, 0, 7, 1],
+        [7, 1],
+        [100, 1, 13],               # beta spends 13 TP
+        [8, 1, 1, 3],
+        [6, 2],
+        [7, 0],
+        [304, 1, 6],                # beta's TP buff goes up to +6
+        [303, 1],                   # beta's TP buff is removed
+        [5, 1, 0],                  # beta dies
+        [8, 0, 10, 3],
+    ],
+}
+
+def full_fold(action_index):
+    replay = FightReplay(FIGHT_DATA, checkpoint_interval=len(FIGHT_DATA['actions']) + 1)
+    state = replay.initial_state(FIGHT_DATA)
+    for action in replay.actions[:action_index]:
+        replay.apply(state, action)
+    state.action_index = action_index
+    return state
+
+@pytest.mark.parametrize("checkpoint_interval", [1, 2, 3, 7, 50])
+def test_checkpoints_match_full_fold(checkpoint_interval):
+    replay = FightReplay(FIGHT_DATA, checkpoint_interval=checkpoint_interval)
+    for i in range(len(FIGHT_DATA['actions']) + 1):
+        assert replay.state_at(i) == full_fold(i)
+
+def test_move_and_life_lost_with_erosion():
+    state = FightReplay(FIGHT_DATA).state_at(7)
+    alpha, beta = state.entities[0], state.entities[1]
+
+    assert alpha.cell == 12
+    assert (alpha.tp, alpha.mp) == (7, 1)
+    assert (beta.life, beta.max_life) == (85, 99)
+
+def test_effect_add_update_remove():
+    replay = FightReplay(FIGHT_DATA)
+
+    beta = replay.state_at(8).entities[1]
+    assert beta.effects[1].value == 4
+    assert (beta.tp, beta.total_tp) == (14, 14)
+
+    beta = replay.state_at(16).entities[1]
+    assert beta.effects[1].value == 6
+    assert beta.effects[1].turns == 1
+    assert (beta.tp, beta.total_tp) == (16, 16)
+
+    beta = replay.state_at(17).entities[1]
+    assert beta.effects == {}
+    assert (beta.tp, beta.total_tp) == (10, 10)
+
+def test_summon_and_player_dead():
+    state = FightReplay(FIGHT_DATA).final_state
+
+    summon = state.entities[2]
+    assert (summon.cell, summon.team, summon.alive) == (30, 1, True)
+
+    beta = state.entities[1]
+    assert not beta.alive
+    assert beta.life == 0
+
+def test_state_at_turn_refills_pools():
+    state = FightReplay(FIGHT_DATA).state_at_turn(2)
+
+    assert state.turn == 2
+    assert (state.entities[0].tp, state.entities[0].mp) == (10, 3)
+    assert (state.entities[1].tp, state.entities[1].total_tp) == (14, 14)
+
+@pytest.mark.parametrize("turn", [-1, 0, 3, 99])
+def test_state_at_turn_out_of_range(turn):
+    replay = FightReplay(FIGHT_DATA)
+
+    assert replay.turn_range == (1, 2)
+    with pytest.raises(ValueError):
+        replay.state_at_turn(turn)
+
+def test_summon_declared_in_leeks_keeps_stats():
+    fight_data = {
+        'leeks': [
+            {'id': 0, 'team': 1, 'cellPos': 10, 'life': 100, 'tp': 10, 'mp': 3},
+            {'id': 2, 'name': 'bulb', 'team': 1, 'life': 50, 'tp': 6, 'mp': 4, 'summon': True},
+        ],
+        'actions': [[0], [6, 1], [9, 0, 2, 30, 1], [101, 2, 20], [6, 2]],
+    }
+    replay = FightReplay(fight_data)
+
+    assert not replay.state_at(2).entities[2].alive
+
+    summon = replay.final_state.entities[2]
+    assert (summon.name, summon.cell, summon.alive) == ('bulb', 30, True)
+    assert (summon.life, summon.max_life, summon.tp, summon.mp) == (30, 50, 6, 4)
+
+def test_stack_effect_updates_pool():
+    fight_data = {
+        'leeks': [{'id': 0, 'life': 100, 'tp': 10, 'mp': 3}],
+        'actions': [
+            [302, 5, 1, 0, 0, 8, 2, 2, 0],  # +2 TP (effect 1)
+            [14, 1, 3],                     # stacked to +5 TP
+            [303, 1],
+        ],
+    }
+    replay = FightReplay(fight_data)
+
+    entity = replay.state_at(2).entities[0]
+    assert entity.effects[1].value == 5
+    assert (entity.tp, entity.total_tp) == (15, 15)
+
+    entity = replay.final_state.entities[0]
+    assert (entity.tp, entity.total_tp) == (10, 10)
+
+@pytest.mark.parametrize("fight_data", [None, {}, {'leeks': [{'id': 0}]}, {'leeks': [], 'actions': []}])
+def test_fight_without_data(fight_data):
+    with pytest.raises(ValueError, match="fight has no data yet"):
+        FightReplay(fight_data)
+
+def test_unknown_action_types_are_dropped():
+    fight_data = {'leeks': [{'id': 0, 'cellPos': 1}], 'actions': [[0], [9999, 'x'], [10, 0, 5, [5]]]}
+    replay = FightReplay(fight_data)
+
+    assert len(replay.actions) == 2
+    assert replay.final_state.entities[0].cell == 5
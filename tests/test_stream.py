@@ -0,0 +1,143 @@
+import json
+import pytest
+from leek_llm.stream import JsonStream, iter_fields, iter_fight_logs
+
+CHUNK_SIZES = [1, 2, 3, 5, 7, 64, 4096]
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def fight_logs(logs, size, **kwargs):
+    return list(iter_fight_logs(chunked(json.dumps(logs), size), **kwargs))
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_numbers_split_across_chunks(size):
+    numbers = [1.5, 2e3, -0.25, 10, -7, 1.25e-5, 0, 123456789, 3.0]
+    text = json.dumps({'a': {'b': numbers}})
+
+    stream = JsonStream(chunked(text, size))
+    assert list(iter_fields(stream, ['a'], {'b'})) == [('b', numbers)]
+
+    stream = JsonStream(chunked(text.replace('[', '[ ').replace(',', ' , '), size))
+    for _ in stream.iter_object():
+        for _ in stream.iter_object():
+            assert [stream.read_value() for _ in stream.iter_array()] == numbers
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_iter_fields_skips_other_values(size):
+    data = {
+        'id': 1,
+        'report': {'empty': {}, 'list': [], 'text': 'a "quoted" \\ é \n string'},
+        'data': {'map': {'cells': [[1, 2], []]}, 'leeks': [{'id': 0}], 'actions': [[0], [6, 1]], 'ops': {}},
+        'queue': None,
+    }
+    stream = JsonStream(chunked(json.dumps(data), size))
+
+    assert dict(iter_fields(stream, ['data'], {'leeks', 'actions'})) == {
+        'leeks': [{'id': 0}],
+        'actions': [[0], [6, 1]],
+    }
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_empty_containers(size):
+    stream = JsonStream(chunked(' { "a" : [ ] , "b" : { } } ', size))
+    keys = []
+    for key in stream.iter_object():
+        keys.append(key)
+        assert list(stream.iter_array() if key == 'a' else stream.iter_object()) == []
+
+    assert keys == ['a', 'b']
+
+def test_truncated_input_raises():
+    stream = JsonStream(chunked('{"a": [1, 2', 3))
+    with pytest.raises(json.JSONDecodeError):
+        for _ in stream.iter_object():
+            for _ in stream.iter_array():
+                stream.read_value()
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_fight_logs_escaped_strings(size):
+    logs = {'12': {'3': [[1, 1, 'tab\there "quote" \\ é']]}, 'leeks': 5, '13': {}}
+
+    assert fight_logs(logs, size) == [('12', {'debug_log': 'tab\there "quote" \\ é'})]
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_fight_logs_caps_dedup_and_truncation(size):
+    logs = {
+        '12': {
+            '1': [[1, 1, 'a'], [1, 1, 'a'], [1, 1, 'x' * 50]],
+            '2': [[1, 1, 'b'], [1, 1, 'c'], [1, 1, 'd']],
+        },
+        '13': {'1': [[2, 1, 'a'], [2, 1, 'a']]},
+    }
+
+    assert fight_logs(logs, size, max_debug_logs=3, max_message_length=10) == [
+        ('12', {'debug_log': 'a'}),
+        ('12', {'debug_log': 'xxxxxxxxxx... (40 more characters)'}),
+        ('12', {'debug_log': 'b'}),
+        ('12', {'suppressed': {'errors': 0, 'debug_logs': 2, 'duplicates': 1, 'truncated': 1}}),
+        ('13', {'debug_log': 'a'}),
+        ('13', {'suppressed': {'errors': 0, 'debug_logs': 0, 'duplicates': 1, 'truncated': 0}}),
+    ]
+
+def test_fight_logs_without_dedup():
+    logs = {'12': {'1': [[1, 1, 'a'], [1, 1, 'a']]}}
+
+    assert fight_logs(logs, 3, dedup=False) == [('12', {'debug_log': 'a'}), ('12', {'debug_log': 'a'})]
+
+def test_fight_logs_error_cap():
+    error = [1, 3, 'line 1: ', 16, ['x']]
+    logs = {'12': {'1': [error, error, [1, 3, 'line 2: ', 16, ['y']], [1, 3, 'line 3: ', 16, ['z']]]}}
+
+    entries = fight_logs(logs, 5, max_errors=2)
+
+    assert [entry['error_number'] for _, entry in entries[:2]] == [16, 16]
+    assert entries[0][1]['error'] != entries[1][1]['error']
+    assert entries[2] == ('12', {'suppressed': {'errors': 1, 'debug_logs': 0, 'duplicates': 1, 'truncated': 0}})
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_skip_value_scans_nested_and_escaped(size):
+    skipped = {'s': 'brackets ] } [ { and "quotes" \\ \\"', 'n': [[], {}, [1.5, {'a': ['\\']}]], 'x': -2e3}
+    text = json.dumps({'skip': skipped, 'str': '] "', 'num': 1.25, 'keep': [1, 'a]b']})
+    stream = JsonStream(chunked(text, size))
+
+    assert dict(iter_fields(stream, [], {'keep'})) == {'keep': [1, 'a]b']}
+    assert stream.peek() == ''
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+@pytest.mark.parametrize("limit", [0, 1, 4, 5, 6, 9, 100])
+def test_read_string_prefix(size, limit):
+    value = 'abé"\\\n' + 'z' * 20
+    text = json.dumps([value, 1], ensure_ascii=True)
+    stream = JsonStream(chunked(text, size))
+
+    items = []
+    for index in stream.iter_array():
+        items.append(stream.read_string(limit) if index == 0 else stream.read_value())
+
+    (prefix, length), number = items
+    raw = json.dumps(value, ensure_ascii=True)[1:-1]
+    assert length == len(raw)
+    assert value.startswith(prefix)
+    assert min(limit, length) - 6 <= len(json.dumps(prefix, ensure_ascii=True)[1:-1]) <= limit
+    assert number == 1
+
+def test_fight_logs_dedup_uses_whole_message():
+    logs = {'12': {'1': [[1, 1, 'x' * 20 + 'a'], [1, 1, 'x' * 20 + 'b'], [1, 1, 'x' * 20 + 'a']]}}
+
+    assert fight_logs(logs, 3, max_message_length=10) == [
+        ('12', {'debug_log': 'xxxxxxxxxx... (11 more characters)'}),
+        ('12', {'debug_log': 'xxxxxxxxxx... (11 more characters)'}),
+        ('12', {'suppressed': {'errors': 0, 'debug_logs': 0, 'duplicates': 1, 'truncated': 2}}),
+    ]
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_fight_logs_past_both_caps(size):
+    error = [1, 3, 'line 1: ', 16, ['x']]
+    logs = {'12': {'1': [[1, 1, 'a'], error, [1, 1, 'big ' * 1000], [1, 3, 'line 2: ', 16, ['y']], [1, 1, 'c']]}}
+
+    entries = fight_logs(logs, size, max_errors=1, max_debug_logs=1)
+
+    assert entries[0] == ('12', {'debug_log': 'a'})
+    assert entries[1][1]['error_number'] == 16
+    assert entries[2] == ('12', {'suppressed': {'errors': 1, 'debug_logs': 2, 'duplicates': 0, 'truncated': 0}})